@@ -819,9 +819,10 @@ def add_file_metadata(metadata_store: Path, ap: AddParameter):
     _, _, mrr, _, file_tree = \
         get_tvl_uuid_mrr_metadata_file_tree(metadata_store, ap)
 
-    if ap.file_path in file_tree:
-        file_level_metadata = file_tree.get_metadata(ap.file_path)
-    else:
+    # get_metadata returns None for unknown paths, so a single tree
+    # traversal suffices to decide between reuse and creation.
+    file_level_metadata = file_tree.get_metadata(ap.file_path)
+    if file_level_metadata is None:
         file_level_metadata = Metadata()
         file_tree.add_metadata(ap.file_path, file_level_metadata)
 
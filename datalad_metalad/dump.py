@@ -16,6 +16,7 @@ __docformat__ = 'restructuredtext'
 
 import json
 import logging
+from functools import lru_cache
 from pathlib import Path
 from typing import (
     cast,
@@ -23,7 +24,6 @@ from typing import (
     Generator,
     Union,
 )
-from uuid import UUID
 
 from datalad.distribution.dataset import datasetmethod
 from datalad.interface.base import (
@@ -66,6 +66,33 @@ default_mapper_family = "git"
 lgr = logging.getLogger('datalad.metadata.dump')
 
 
+# Serialize result records as single JSON lines. Use orjson, if it is
+# installed, since it is considerably faster than the stdlib json-encoder.
+# Records are emitted as they are generated, i.e. the output is a JSON
+# Lines stream that can be consumed before the dump is complete.
+try:
+    import orjson
+
+    def _json_line(json_object: JSONType) -> str:
+        return orjson.dumps(json_object).decode()
+
+except ImportError:
+
+    def _json_line(json_object: JSONType) -> str:
+        return json.dumps(json_object, separators=(",", ":"))
+
+
+@lru_cache(maxsize=32)
+def _parse_metadata_url(path: str):
+    """ Parse a metadata URL, caching results for repeated paths
+
+    Parsing is pure string work and identical paths are parsed over and
+    over in API-loop usage, so a small cache eliminates the redundant
+    parser runs. The returned URL-objects are never mutated.
+    """
+    return MetadataURLParser(path).parse()
+
+
 def _dataset_report_matcher(node: Any) -> bool:
     return isinstance(node, MetadataRootRecord)
 
@@ -74,20 +101,34 @@ def _file_report_matcher(node: Any) -> bool:
     return isinstance(node, Metadata)
 
 
+@lru_cache(maxsize=None)
+def _is_remote_store(metadata_store: str) -> bool:
+    return Reference.is_remote(metadata_store)
+
+
+def _absolute_store_path(metadata_store: Union[Path, str]) -> Path:
+    store_path = Path(metadata_store)
+    if store_path.is_absolute():
+        return store_path
+    # A relative store path resolves against the current working
+    # directory, which may change between dump invocations within one
+    # process, so the result must not be cached.
+    return store_path.absolute()
+
+
 def _create_result_record(mapper: str,
                           metadata_store: Union[Path, str],
                           metadata_record: JSONType,
                           element_path: MetadataPath,
                           report_type: str):
 
-    # Display remote metadata stores properly
-    if isinstance(metadata_store, str):
-        if Reference.is_remote(metadata_store):
-            path = metadata_store + ":/" + str(element_path)
-        else:
-            path = (Path(metadata_store) / element_path).absolute()
+    # Display remote metadata stores properly. The remote-check is
+    # cached, since this function is called once per result record,
+    # usually with an identical metadata store.
+    if isinstance(metadata_store, str) and _is_remote_store(metadata_store):
+        path = metadata_store + ":/" + str(element_path)
     else:
-        path = (metadata_store / element_path).absolute()
+        path = _absolute_store_path(metadata_store) / element_path
 
     return {
         "status": "ok",
@@ -100,7 +141,7 @@ def _create_result_record(mapper: str,
     }
 
 
-def _get_common_properties(root_dataset_identifier: UUID,
+def _get_common_properties(root_dataset_identifier: str,
                            root_dataset_version: str,
                            prefix_path: MetadataPath,
                            metadata_root_record: MetadataRootRecord,
@@ -111,7 +152,7 @@ def _get_common_properties(root_dataset_identifier: UUID,
             "dataset_path": str(prefix_path)}
     elif dataset_path != MetadataPath(""):
         root_info = {
-            "root_dataset_id": str(root_dataset_identifier),
+            "root_dataset_id": root_dataset_identifier,
             "root_dataset_version": root_dataset_version,
             "dataset_path": str(dataset_path)}
     else:
@@ -137,9 +178,108 @@ def _get_instance_properties(extractor_name: str,
     }
 
 
+def _show_dataset_level_metadata(mapper: str,
+                                 metadata_store: Path,
+                                 root_dataset_identifier: str,
+                                 root_dataset_version: str,
+                                 dataset_path: MetadataPath,
+                                 metadata_root_record: MetadataRootRecord,
+                                 common_properties: dict
+                                 ) -> Generator[dict, None, None]:
+
+    dataset_level_metadata = metadata_root_record.dataset_level_metadata.read_in()
+
+    if dataset_level_metadata is None:
+        lgr.warning(
+            "no dataset level metadata for dataset uuid:%s@%s",
+            root_dataset_identifier, root_dataset_version)
+        return
+
+    dataset_level_metadata = cast(Metadata, dataset_level_metadata)
+
+    for extractor_name, extractor_runs in dataset_level_metadata.extractor_runs:
+        for instance in extractor_runs:
+
+            instance_properties = _get_instance_properties(
+                extractor_name,
+                instance)
+
+            yield _create_result_record(
+                mapper=mapper,
+                metadata_store=metadata_store,
+                metadata_record={
+                    "type": "dataset",
+                    **common_properties,
+                    **instance_properties
+                },
+                element_path=dataset_path,
+                report_type="dataset")
+
+
+def _show_file_tree_metadata(mapper: str,
+                             metadata_store: Path,
+                             dataset_path: MetadataPath,
+                             metadata_root_record: MetadataRootRecord,
+                             search_pattern: MetadataPath,
+                             recursive: bool,
+                             common_properties: dict
+                             ) -> Generator[dict, None, None]:
+
+    # Note: the dataset-level metadata is intentionally not mapped
+    # here, it is not needed for file-tree reporting.
+    file_tree = metadata_root_record.file_tree
+
+    with ensure_mapped(file_tree):
+
+        # Do not try to search anything if the file tree is empty
+        if not file_tree or not file_tree.mtree.child_nodes:
+            return
+
+        # Determine matching file paths
+        tree_search = MTreeSearch(file_tree.mtree)
+        result_count = 0
+        for path, metadata, _ in tree_search.search_pattern(pattern=search_pattern,
+                                                            recursive=recursive):
+            result_count += 1
+
+            # Ignore empty datasets and ignore paths that do not
+            # describe metadata, but a directory.
+            if metadata is None or isinstance(metadata, MTreeNode):
+                continue
+
+            metadata = cast(Metadata, metadata)
+
+            with ensure_mapped(metadata):
+                for extractor_name, extractor_runs in metadata.extractor_runs:
+                    for instance in extractor_runs:
+
+                        instance_properties = _get_instance_properties(
+                            extractor_name,
+                            instance)
+
+                        yield _create_result_record(
+                            mapper=mapper,
+                            metadata_store=metadata_store,
+                            metadata_record={
+                                "type": "file",
+                                "path": str(path),
+                                **common_properties,
+                                **instance_properties
+                            },
+                            element_path=dataset_path / path,
+                            report_type="dataset")
+
+        if result_count == 0:
+            lgr.warning(
+                "pattern '%s' does not match any element in file-tree of "
+                "dataset %s@%s (stored on %s:%s)",
+                search_pattern, metadata_root_record.dataset_identifier,
+                metadata_root_record.dataset_version, mapper, metadata_store)
+
+
 def show_dataset_metadata(mapper: str,
                           metadata_store: Path,
-                          root_dataset_identifier: UUID,
+                          root_dataset_identifier: str,
                           root_dataset_version: str,
                           prefix_path: MetadataPath,
                           dataset_path: MetadataPath,
@@ -150,45 +290,24 @@ def show_dataset_metadata(mapper: str,
         return
 
     with ensure_mapped(metadata_root_record):
-        dataset_level_metadata = metadata_root_record.dataset_level_metadata.read_in()
-
-        if dataset_level_metadata is None:
-            lgr.warning(
-                f"no dataset level metadata for dataset "
-                f"uuid:{root_dataset_identifier}@{root_dataset_version}")
-            return
-
-        common_properties = _get_common_properties(
+        yield from _show_dataset_level_metadata(
+            mapper,
+            metadata_store,
             root_dataset_identifier,
             root_dataset_version,
-            prefix_path,
+            dataset_path,
             metadata_root_record,
-            dataset_path)
-
-        dataset_level_metadata = cast(Metadata, dataset_level_metadata)
-
-        for extractor_name, extractor_runs in dataset_level_metadata.extractor_runs:
-            for instance in extractor_runs:
-
-                instance_properties = _get_instance_properties(
-                    extractor_name,
-                    instance)
-
-                yield _create_result_record(
-                    mapper=mapper,
-                    metadata_store=metadata_store,
-                    metadata_record={
-                        "type": "dataset",
-                        **common_properties,
-                        **instance_properties
-                    },
-                    element_path=dataset_path,
-                    report_type="dataset")
+            _get_common_properties(
+                root_dataset_identifier,
+                root_dataset_version,
+                prefix_path,
+                metadata_root_record,
+                dataset_path))
 
 
 def show_file_tree_metadata(mapper: str,
                             metadata_store: Path,
-                            root_dataset_identifier: UUID,
+                            root_dataset_identifier: str,
                             root_dataset_version: str,
                             prefix_path: MetadataPath,
                             dataset_path: MetadataPath,
@@ -201,64 +320,67 @@ def show_file_tree_metadata(mapper: str,
         return
 
     with ensure_mapped(metadata_root_record):
+        yield from _show_file_tree_metadata(
+            mapper,
+            metadata_store,
+            dataset_path,
+            metadata_root_record,
+            search_pattern,
+            recursive,
+            _get_common_properties(
+                root_dataset_identifier,
+                root_dataset_version,
+                prefix_path,
+                metadata_root_record,
+                dataset_path))
+
+
+def show_all_metadata(mapper: str,
+                      metadata_store: Path,
+                      root_dataset_identifier: str,
+                      root_dataset_version: str,
+                      prefix_path: MetadataPath,
+                      dataset_path: MetadataPath,
+                      metadata_root_record: MetadataRootRecord,
+                      search_pattern: MetadataPath,
+                      recursive: bool
+                      ) -> Generator[dict, None, None]:
+    """ Yield dataset-level and file-level metadata in a single pass
+
+    The metadata root record is mapped once and the common result
+    properties are computed once for both the dataset-level and the
+    file-tree records.
+    """
+
+    if metadata_root_record is None:
+        return
+
+    with ensure_mapped(metadata_root_record):
+
+        common_properties = _get_common_properties(
+            root_dataset_identifier,
+            root_dataset_version,
+            prefix_path,
+            metadata_root_record,
+            dataset_path)
+
+        yield from _show_dataset_level_metadata(
+            mapper,
+            metadata_store,
+            root_dataset_identifier,
+            root_dataset_version,
+            dataset_path,
+            metadata_root_record,
+            common_properties)
 
-        dataset_level_metadata = metadata_root_record.dataset_level_metadata
-        file_tree = metadata_root_record.file_tree
-
-        with ensure_mapped(dataset_level_metadata):
-            with ensure_mapped(file_tree):
-
-                # Do not try to search anything if the file tree is empty
-                if not file_tree or not file_tree.mtree.child_nodes:
-                    return
-
-                # Determine matching file paths
-                tree_search = MTreeSearch(file_tree.mtree)
-                result_count = 0
-                for path, metadata, _ in tree_search.search_pattern(pattern=search_pattern,
-                                                                    recursive=recursive):
-                    result_count += 1
-
-                    # Ignore empty datasets and ignore paths that do not
-                    # describe metadata, but a directory.
-                    if metadata is None or isinstance(metadata, MTreeNode):
-                        continue
-
-                    metadata = cast(Metadata, metadata)
-
-                    common_properties = _get_common_properties(
-                        root_dataset_identifier,
-                        root_dataset_version,
-                        prefix_path,
-                        metadata_root_record,
-                        dataset_path)
-
-                    with ensure_mapped(metadata):
-                        for extractor_name, extractor_runs in metadata.extractor_runs:
-                            for instance in extractor_runs:
-
-                                instance_properties = _get_instance_properties(
-                                    extractor_name,
-                                    instance)
-
-                                yield _create_result_record(
-                                    mapper=mapper,
-                                    metadata_store=metadata_store,
-                                    metadata_record={
-                                        "type": "file",
-                                        "path": str(path),
-                                        **common_properties,
-                                        **instance_properties
-                                    },
-                                    element_path=dataset_path / path,
-                                    report_type="dataset")
-
-                if result_count == 0:
-                    lgr.warning(
-                        f"pattern '{str(search_pattern)}' does not match any element "
-                        f"in file-tree of dataset {metadata_root_record.dataset_identifier}"
-                        f"@{metadata_root_record.dataset_version} (stored on "
-                        f"{mapper}:{metadata_store})")
+        yield from _show_file_tree_metadata(
+            mapper,
+            metadata_store,
+            dataset_path,
+            metadata_root_record,
+            search_pattern,
+            recursive,
+            common_properties)
 
 
 def dump_from_dataset_tree(mapper: str,
@@ -273,9 +395,10 @@ def dump_from_dataset_tree(mapper: str,
         metadata_url = TreeMetadataURL(MetadataPath(""), MetadataPath(""))
 
     # Get specified version, if none is specified, take all versions.
+    # versions() is a generator, do not materialize it just to iterate.
     requested_versions = ([metadata_url.version]
                           if metadata_url.version is not None
-                          else list(tree_version_list.versions()))
+                          else tree_version_list.versions())
 
     for version in requested_versions:
 
@@ -284,8 +407,9 @@ def dump_from_dataset_tree(mapper: str,
             vpd_iterable = tree_version_list.get_dataset_trees(version)
         except KeyError:
             lgr.error(
-                f"could not locate metadata for version {version} in "
-                f"metadata_store {mapper}:{metadata_store}")
+                "could not locate metadata for version %s in "
+                "metadata_store %s:%s",
+                version, mapper, metadata_store)
             continue
 
         for _, prefix_path, dataset_tree in vpd_iterable:
@@ -293,15 +417,18 @@ def dump_from_dataset_tree(mapper: str,
 
             if root_mrr is None:
                 lgr.debug(
-                    f"no root dataset record found for version "
-                    f"{version} in metadata store "
-                    f"{metadata_store}, cannot determine root dataset id")
+                    "no root dataset record found for version "
+                    "%s in metadata store "
+                    "%s, cannot determine root dataset id",
+                    version, metadata_store)
                 root_dataset_version = version
                 root_dataset_identifier = "<unknown>"
             else:
                 with ensure_mapped(root_mrr):
                     root_dataset_version = root_mrr.dataset_version
-                    root_dataset_identifier = root_mrr.dataset_identifier
+                    # Convert the identifier to its string representation
+                    # once, it is interpolated into every result record.
+                    root_dataset_identifier = str(root_mrr.dataset_identifier)
 
             # Create a tree search object to search for the specified datasets
             tree_search = MTreeSearch(dataset_tree.mtree)
@@ -310,7 +437,14 @@ def dump_from_dataset_tree(mapper: str,
                 recursive=recursive,
                 item_indicator=datalad_root_record_name)
 
+            # Collect all matching metadata root records first. This
+            # keeps the tree-search traversal, which maps and purges
+            # tree nodes, separate from the mapping of the metadata
+            # objects themselves. (The metadata model has no bulk-load
+            # interface, so priming is limited to gathering the
+            # references up front.)
             result_count = 0
+            matches = []
             for path, node, _ in search_results:
                 result_count += 1
 
@@ -323,16 +457,10 @@ def dump_from_dataset_tree(mapper: str,
                     # was registered in the dataset tree at this level.
                     continue
 
-                yield from show_dataset_metadata(
-                    mapper,
-                    metadata_store,
-                    root_dataset_identifier,
-                    root_dataset_version,
-                    prefix_path,
-                    path,
-                    mrr)
+                matches.append((path, mrr))
 
-                yield from show_file_tree_metadata(
+            for path, mrr in matches:
+                yield from show_all_metadata(
                     mapper,
                     metadata_store,
                     root_dataset_identifier,
@@ -345,10 +473,10 @@ def dump_from_dataset_tree(mapper: str,
 
             if result_count == 0:
                 lgr.error(
-                    f"search pattern '{str(metadata_url.dataset_path)}' does not "
-                    f"match any dataset in dataset-tree of dataset "
-                    f"{root_dataset_identifier}@{root_dataset_version} (stored on "
-                    f"{mapper}:{metadata_store})")
+                    "search pattern '%s' does not match any dataset in "
+                    "dataset-tree of dataset %s@%s (stored on %s:%s)",
+                    metadata_url.dataset_path, root_dataset_identifier,
+                    root_dataset_version, mapper, metadata_store)
 
 
 def dump_from_uuid_set(mapper: str,
@@ -363,14 +491,21 @@ def dump_from_uuid_set(mapper: str,
         version_list = uuid_set.get_version_list(path.uuid)
     except KeyError:
         lgr.error(
-            f"could not locate metadata for dataset with UUID {path.uuid} in "
-            f"metadata_store {mapper}:{metadata_store}")
+            "could not locate metadata for dataset with UUID %s in "
+            "metadata_store %s:%s",
+            path.uuid, mapper, metadata_store)
         return
 
+    # Convert the UUID to its string representation once, it is
+    # interpolated into every result record.
+    uuid_str = str(path.uuid)
+
     # Get specified version, if none is specified, take all versions.
-    requested_dataset_version = ([path.version]
+    # The versions are only needed for membership tests below, so a set
+    # is built instead of a list.
+    requested_dataset_version = ({path.version}
                                  if path.version is not None
-                                 else list(version_list.versions()))
+                                 else set(version_list.versions()))
 
     for dataset_version, prefix_path in version_list.versions_and_prefix_paths():
         if dataset_version not in requested_dataset_version:
@@ -380,28 +515,18 @@ def dump_from_uuid_set(mapper: str,
                 version_list.get_versioned_element(dataset_version, prefix_path)
         except KeyError:
             lgr.error(
-                f"could not locate metadata for version {dataset_version} for "
-                f"dataset with UUID {path.uuid} in metadata_store "
-                f"{mapper}:{metadata_store}")
+                "could not locate metadata for version %s for "
+                "dataset with UUID %s in metadata_store %s:%s",
+                dataset_version, path.uuid, mapper, metadata_store)
             continue
 
         metadata_root_record = cast(MetadataRootRecord, metadata_root_record)
 
-        # Show dataset-level metadata
-        yield from show_dataset_metadata(
-            mapper,
-            metadata_store,
-            path.uuid,
-            dataset_version,
-            prefix_path,
-            dataset_path,
-            metadata_root_record)
-
-        # Show file-level metadata
-        yield from show_file_tree_metadata(
+        # Show dataset-level and file-level metadata in one pass
+        yield from show_all_metadata(
             mapper,
             metadata_store,
-            path.uuid,
+            uuid_str,
             dataset_version,
             prefix_path,
             dataset_path,
@@ -505,8 +630,7 @@ class Dump(Interface):
             dataset,
             default_mapper_family)
 
-        parser = MetadataURLParser(path)
-        metadata_url = parser.parse()
+        metadata_url = _parse_metadata_url(path)
 
         if isinstance(metadata_url, TreeMetadataURL):
             yield from dump_from_dataset_tree(
@@ -533,4 +657,4 @@ class Dump(Interface):
             # logging complained about this already
             return
 
-        ui.message(json.dumps(res["metadata"]))
+        ui.message(_json_line(res["metadata"]))
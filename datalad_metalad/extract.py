@@ -10,9 +10,11 @@
 Run a dataset-level metadata extractor on a dataset
 or run a file-level metadata extractor on a file
 """
+import hashlib
 import json
 import logging
 import time
+from functools import lru_cache
 from os import curdir
 from pathlib import (
     Path,
@@ -55,6 +57,7 @@ from .extractors.base import (
 )
 
 from datalad.support.constraints import (
+    EnsureBool,
     EnsureNone,
     EnsureStr,
 )
@@ -73,10 +76,13 @@ __docformat__ = "restructuredtext"
 
 default_mapper_family = "git"
 
+# result statuses that indicate a failed operation
+_FAILURE_STATUSES = frozenset(("error", "impossible"))
+
 lgr = logging.getLogger("datalad.metadata.extract")
 
 
-@dataclass
+@dataclass(frozen=True)
 class ExtractionArguments:
     source_dataset: Dataset
     source_dataset_id: UUID
@@ -89,6 +95,9 @@ class ExtractionArguments:
     file_tree_path: Optional[MetadataPath]
     agent_name: str
     agent_email: str
+    # Pre-fetched status record for the file, if the status of a
+    # multi-file batch was queried up front.
+    path_status: Optional[Dict] = None
 
 
 @build_doc
@@ -180,7 +189,11 @@ class Extract(Interface):
             assume a dataset level metadata extractor is
             specified.
             You might provide an absolute file path, but it has to contain
-            the dataset path as prefix.""",
+            the dataset path as prefix.
+            In the Python API a list of paths may be given. All paths are
+            then processed in a single invocation, which amortizes the
+            dataset checks, the extractor lookup, and the configuration
+            reads over the whole batch.""",
             constraints=EnsureStr() | EnsureNone()),
         dataset=Parameter(
             args=("-d", "--dataset"),
@@ -227,7 +240,7 @@ class Extract(Interface):
     @eval_results
     def __call__(
             extractorname: str,
-            path: Optional[str] = None,
+            path: Optional[Union[str, List[str]]] = None,
             dataset: Optional[Union[Dataset, str]] = None,
             context: Optional[Union[str, Dict[str, str]]] = None,
             get_context: bool = False,
@@ -236,10 +249,12 @@ class Extract(Interface):
         
         # Get basic arguments
         extractor_name = extractorname
-        extractor_args = ([path] + extractorargs
-                          if force_dataset_level
-                          else extractorargs)
-        path = None if force_dataset_level else path
+        if force_dataset_level:
+            extractor_args = ((path if isinstance(path, list) else [path])
+                              + extractorargs)
+            path = None
+        else:
+            extractor_args = extractorargs
         context = (
             {}
             if context is None
@@ -265,60 +280,66 @@ class Extract(Interface):
             )
             return
 
-        # Create a relative Path-instance, if path to a file is given. We have
-        # to be careful not to resolve the path, because that could resolve the
-        # git-annex link.
-        path_object = None
-        if path is not None:
-            path_object = Path(path)
-            if path_object.is_absolute():
-                relative_path = None
-                for dataset_path in (source_dataset.pathobj,
-                                     source_dataset.pathobj.resolve()):
-                    try:
-                        relative_path = path_object.relative_to(dataset_path)
-                        break
-                    except ValueError:
-                        pass
-                if relative_path is None:
-                    raise ValueError(
-                        f"The provided path {path} is not contained in the "
-                        f"dataset given by {source_dataset.pathobj}"
-                    )
-                path_object = relative_path
-
-        _, file_tree_path = get_path_info(source_dataset, path_object, None)
+        # A list of paths may be given via the Python API. All paths are
+        # processed in this single invocation, and the setup below, i.e.
+        # the extractor lookup, the argument conversion, the UUID-parse,
+        # and the configuration reads, is performed once for the whole
+        # batch.
+        paths = path if isinstance(path, list) else [path]
 
         extractor_class = get_extractor_class(extractor_name)
-
-        extraction_arguments = ExtractionArguments(
-            source_dataset=source_dataset,
-            source_dataset_id=UUID(source_dataset.id),
-            source_dataset_version=source_dataset_version,
-            local_source_object_path=(
-                    source_dataset.pathobj / file_tree_path).absolute(),
-            extractor_class=extractor_class,
-            extractor_type=None,
-            extractor_name=extractor_name,
-            extraction_parameter=args_to_dict(extractor_args),
-            file_tree_path=file_tree_path,
-            agent_name=source_dataset.config.get("user.name"),
-            agent_email=source_dataset.config.get("user.email"))
-
-        # If a path is given, we assume file-level metadata extraction is
-        # requested, and the extractor class should be a subclass of
-        # FileMetadataExtractor (or a legacy extractor).
-        # If path is not given, we assume that a dataset-level extraction is
-        # requested and the extractor class is a subclass of
-        # DatasetMetadataExtractor (or a legacy extractor class).
-        if path:
-            extraction_arguments.extractor_type = 'file'
-            # Check whether the path points to a sub_dataset.
-            ensure_path_validity(source_dataset, file_tree_path)
-        else:
-            extraction_arguments.extractor_type = 'dataset'
-        
-        yield from do_extraction(ep=extraction_arguments)
+        extraction_parameter = args_to_dict(extractor_args)
+        source_dataset_id = UUID(source_dataset.id)
+        agent_name = source_dataset.config.get("user.name")
+        agent_email = source_dataset.config.get("user.email")
+
+        # Resolve all given paths to file-tree paths first, so that the
+        # status of a multi-file batch can be queried with a single
+        # status call instead of one call per file.
+        resolved_paths = [
+            (current_path,
+             get_path_info(source_dataset,
+                           get_path_object(source_dataset, current_path),
+                           None)[1])
+            for current_path in paths]
+
+        status_map = {}
+        file_tree_paths = [
+            file_tree_path
+            for current_path, file_tree_path in resolved_paths
+            if current_path]
+        if len(file_tree_paths) > 1:
+            status_map = bulk_path_status(source_dataset, file_tree_paths)
+
+        for current_path, file_tree_path in resolved_paths:
+
+            # If a path is given, we assume file-level metadata extraction
+            # is requested, and the extractor class should be a subclass of
+            # FileMetadataExtractor (or a legacy extractor).
+            # If path is not given, we assume that a dataset-level
+            # extraction is requested and the extractor class is a subclass
+            # of DatasetMetadataExtractor (or a legacy extractor class).
+            extraction_arguments = ExtractionArguments(
+                source_dataset=source_dataset,
+                source_dataset_id=source_dataset_id,
+                source_dataset_version=source_dataset_version,
+                local_source_object_path=(
+                        source_dataset.pathobj / file_tree_path).absolute(),
+                extractor_class=extractor_class,
+                extractor_type='file' if current_path else 'dataset',
+                extractor_name=extractor_name,
+                extraction_parameter=extraction_parameter,
+                file_tree_path=file_tree_path,
+                agent_name=agent_name,
+                agent_email=agent_email,
+                path_status=status_map.get(
+                    str(source_dataset.pathobj / file_tree_path)))
+
+            if current_path:
+                # Check whether the path points to a sub_dataset.
+                ensure_path_validity(source_dataset, file_tree_path)
+
+            yield from do_extraction(ep=extraction_arguments)
         return
 
     @staticmethod
@@ -353,6 +374,29 @@ class Extract(Interface):
             ui.message(json.dumps(context))
 
 
+@lru_cache(maxsize=None)
+def get_extractor_kind(extractor_class: type) -> str:
+    """
+    Classify an extractor class once per class.
+
+    The dispatch in do_extraction and in the legacy extraction functions
+    would otherwise repeat the same issubclass-chain, i.e. the same MRO
+    walks, for every path of a batch. The result is cached because the
+    class hierarchy cannot change at runtime.
+    """
+    if issubclass(extractor_class, FileMetadataExtractor):
+        return "file"
+    if issubclass(extractor_class, DatasetMetadataExtractor):
+        return "dataset"
+    if issubclass(extractor_class, MetadataExtractorBase):
+        return "base"
+    if issubclass(extractor_class, MetadataExtractor):
+        return "legacy-metalad"
+    if issubclass(extractor_class, BaseMetadataExtractor):
+        return "legacy-datalad"
+    return "unknown"
+
+
 def do_extraction(ep: ExtractionArguments):
     extractor_type = ep.extractor_type    
 
@@ -361,7 +405,8 @@ def do_extraction(ep: ExtractionArguments):
         'file': legacy_extract_file,
         'dataset': legacy_extract_dataset,
     }
-    if not issubclass(ep.extractor_class, MetadataExtractorBase):
+    extractor_kind = get_extractor_kind(ep.extractor_class)
+    if extractor_kind in ("legacy-metalad", "legacy-datalad", "unknown"):
         lgr.debug(
             "performing legacy %s-level metadata "
             "extraction (%s) for %s at %s",
@@ -379,7 +424,7 @@ def do_extraction(ep: ExtractionArguments):
         'file': FileMetadataExtractor,
         'dataset': DatasetMetadataExtractor,
     }
-    if not issubclass(ep.extractor_class, extractor_class_map[extractor_type]):
+    if extractor_kind != extractor_type:
         msg = (
             f"A {extractor_type}-level metadata-extraction was attempted",
             "since no path argument was given" if extractor_type == 'dataset' else "",
@@ -398,20 +443,51 @@ def do_extraction(ep: ExtractionArguments):
             if extractor_type == 'file' else ep.source_dataset.path)
     
     if extractor_type == 'file':
-        file_info = get_file_info(ep.source_dataset, ep.file_tree_path)
+        file_info = get_file_info(
+            ep.source_dataset, ep.file_tree_path, ep.path_status)
         extractor = ep.extractor_class(
             ep.source_dataset,
             ep.source_dataset_version,
             file_info,
             ep.extraction_parameter)
+
+        # If result caching is enabled and a result for the extractor,
+        # its version, the file content, and the extraction parameters
+        # exists, the extractor does not have to be executed at all. In
+        # particular, the file content does not have to be fetched.
+        cache_key = (
+            get_extraction_cache_key(ep, extractor.get_version(), file_info)
+            if extraction_result_caching_enabled(ep.source_dataset)
+            else None)
+        if cache_key is not None:
+            cache_entry = read_cached_extraction_result(
+                ep.source_dataset, cache_key)
+            if cache_entry is not None:
+                lgr.debug(
+                    "using cached extraction result %s for %s:%s",
+                    cache_key, ep.extractor_name, ep.file_tree_path)
+                yield get_cached_extraction_record(
+                    ep, extractor.get_version(), cache_entry)
+                return
+
         ensure_content_availability(extractor, file_info)
     else:
+        cache_key = None
         extractor = ep.extractor_class(
         ep.source_dataset,
         ep.source_dataset_version,
         ep.extraction_parameter)
 
-    yield from perform_metadata_extraction(ep, extractor)
+    for result in perform_metadata_extraction(ep, extractor):
+        if cache_key is not None and result.get("status") == "ok":
+            metadata_record = result.get("metadata_record")
+            if metadata_record is not None:
+                write_cached_extraction_result(
+                    ep.source_dataset,
+                    cache_key,
+                    metadata_record["extraction_time"],
+                    metadata_record["extracted_metadata"])
+        yield result
 
 
 def perform_metadata_extraction(
@@ -441,12 +517,12 @@ def perform_metadata_extraction(
             }
             return
     else:
-        failure_count = 0
+        failed = False
         for r in res:
-            if r["status"] in ("error", "impossible"):
-                failure_count += 1
+            if r["status"] in _FAILURE_STATUSES:
+                failed = True
                 yield r
-        if failure_count > 0:
+        if failed:
             return
     
     # Run extraction and update result
@@ -464,7 +540,7 @@ def perform_metadata_extraction(
             agent_name=ep.agent_name,
             agent_email=ep.agent_email,
             extracted_metadata=result.immediate_data)
-        if issubclass(ep.extractor_class, FileMetadataExtractor):
+        if get_extractor_kind(ep.extractor_class) == "file":
             result.datalad_result_dict["metadata_record"].update(
                 dict(path=ep.file_tree_path)
             )
@@ -472,11 +548,108 @@ def perform_metadata_extraction(
     yield result.datalad_result_dict
 
 
+def extraction_result_caching_enabled(dataset: Dataset) -> bool:
+    return dataset.config.obtain(
+        "datalad.metadata.extract-result-cache",
+        False, valtype=EnsureBool())
+
+
+def get_extraction_cache_key(ep: ExtractionArguments,
+                             extractor_version: str,
+                             file_info: FileInfo) -> str:
+    """
+    Build a content-addressed cache key for a file-level extraction.
+
+    The key covers everything the extraction result depends on: the
+    extractor name and version, the git blob of the file content, and
+    the extraction parameters.
+    """
+    key_source = "|".join((
+        ep.extractor_name,
+        extractor_version,
+        file_info.git_sha_sum,
+        json.dumps(ep.extraction_parameter, sort_keys=True)))
+    return hashlib.sha1(key_source.encode()).hexdigest()
+
+
+def get_extraction_cache_path(dataset: Dataset, cache_key: str) -> Path:
+    return (
+        dataset.repo.dot_git / "metalad" / "extract-result-cache"
+        / cache_key[:2] / cache_key[2:])
+
+
+def read_cached_extraction_result(dataset: Dataset,
+                                  cache_key: str) -> Optional[Dict]:
+    try:
+        cache_entry = json.loads(
+            get_extraction_cache_path(dataset, cache_key).read_text())
+    except (OSError, ValueError):
+        return None
+    if not isinstance(cache_entry, dict) \
+            or "extraction_time" not in cache_entry \
+            or "extracted_metadata" not in cache_entry:
+        # not a valid cache entry, treat it as a miss
+        return None
+    return cache_entry
+
+
+def write_cached_extraction_result(dataset: Dataset,
+                                   cache_key: str,
+                                   extraction_time: float,
+                                   extracted_metadata: Dict):
+    cache_file = get_extraction_cache_path(dataset, cache_key)
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        # Write atomically, a concurrent extraction might use the cache.
+        temporary_file = cache_file.with_suffix(".tmp")
+        temporary_file.write_text(json.dumps({
+            "extraction_time": extraction_time,
+            "extracted_metadata": extracted_metadata,
+        }))
+        temporary_file.replace(cache_file)
+    except OSError as e:
+        lgr.debug("could not write extraction result cache entry: %s", e)
+
+
+def get_cached_extraction_record(ep: ExtractionArguments,
+                                 extractor_version: str,
+                                 cache_entry: Dict) -> Dict:
+    """
+    Build a result record from a cached extraction result. This mirrors
+    the record layout created in perform_metadata_extraction, including
+    the time at which the extraction was actually performed. The cache
+    is only used for file-level extractions.
+    """
+    return {
+        "status": "ok",
+        "action": "meta_extract",
+        "type": "file",
+        "path": ep.local_source_object_path,
+        "metadata_record": dict(
+            type="dataset",
+            dataset_id=ep.source_dataset_id,
+            dataset_version=ep.source_dataset_version,
+            extractor_name=ep.extractor_name,
+            extractor_version=extractor_version,
+            extraction_parameter=ep.extraction_parameter,
+            extraction_time=cache_entry["extraction_time"],
+            agent_name=ep.agent_name,
+            agent_email=ep.agent_email,
+            extracted_metadata=cache_entry["extracted_metadata"],
+            path=ep.file_tree_path)}
+
+
+@lru_cache(maxsize=None)
 def get_extractor_class(extractor_name: str) -> Union[
                                             Type[DatasetMetadataExtractor],
                                             Type[FileMetadataExtractor]]:
 
-    """ Get an extractor from its name """
+    """ Get an extractor from its name
+
+    The lookup result is cached, because scanning the entry points of
+    all installed distributions is expensive and the set of installed
+    extractors cannot change within the lifetime of this process.
+    """
     from pkg_resources import iter_entry_points
 
     # The extractor class names of the old datalad-contained extractors have
@@ -526,11 +699,32 @@ def get_extractor_class(extractor_name: str) -> Union[
     return entry_point.load()
 
 
+def bulk_path_status(dataset: Dataset,
+                     file_tree_paths: List[MetadataPath]
+                     ) -> Dict[str, Dict]:
+    """
+    Query the status of several files with a single status call and
+    return the status records keyed by their absolute path.
+    """
+    absolute_paths = [
+        str(dataset.pathobj / file_tree_path)
+        for file_tree_path in file_tree_paths]
+
+    return {
+        path_status["path"]: path_status
+        for path_status in dataset.status(path=absolute_paths,
+                                          result_renderer="disabled")}
+
+
 def get_file_info(dataset: Dataset,
-                  file_path: MetadataPath) -> FileInfo:
+                  file_path: MetadataPath,
+                  path_status: Optional[Dict] = None) -> FileInfo:
     """
     Get information about the file in the dataset or
     None, if the file is not part of the dataset.
+
+    If a pre-fetched status record is given, e.g. from
+    bulk_path_status, no status call is performed here.
     """
 
     # Convert the metadata file-path into a system file path
@@ -542,8 +736,9 @@ def get_file_info(dataset: Dataset,
 
     path = dataset.pathobj / relative_path
 
-    path_status = (
-            list(dataset.status(path, result_renderer="disabled")) or [None])[0]
+    if path_status is None:
+        path_status = next(
+            iter(dataset.status(path, result_renderer="disabled")), None)
 
     if path_status is None:
         raise FileNotFoundError(
@@ -567,6 +762,46 @@ def get_file_info(dataset: Dataset,
             MetadataPath(*path_relative_to_dataset.parts)))
 
 
+@lru_cache(maxsize=128)
+def get_resolved_path(path: str) -> Path:
+    """
+    Resolve a path, caching the result. Path.resolve stats every path
+    component; within a batch the dataset roots do not change, so the
+    resolution has to be done only once per path.
+    """
+    return Path(path).resolve()
+
+
+def get_path_object(dataset: Dataset,
+                    path: Optional[str]
+                    ) -> Optional[Path]:
+    """
+    Create a relative Path-instance, if a path to a file is given. We
+    have to be careful not to resolve the path, because that could
+    resolve the git-annex link.
+    """
+    if path is None:
+        return None
+
+    path_object = Path(path)
+    if path_object.is_absolute():
+        relative_path = None
+        for dataset_path in (dataset.pathobj,
+                             get_resolved_path(dataset.path)):
+            try:
+                relative_path = path_object.relative_to(dataset_path)
+                break
+            except ValueError:
+                pass
+        if relative_path is None:
+            raise ValueError(
+                f"The provided path {path} is not contained in the "
+                f"dataset given by {dataset.pathobj}"
+            )
+        path_object = relative_path
+    return path_object
+
+
 def get_path_info(dataset: Dataset,
                   element_path: Optional[Path],
                   into_dataset_path: Optional[Path] = None
@@ -582,11 +817,11 @@ def get_path_info(dataset: Dataset,
     by appending it to the dataset or current directory and perform
     the above check.
     """
-    full_dataset_path = Path(dataset.path).resolve()
+    full_dataset_path = get_resolved_path(dataset.path)
     if into_dataset_path is None:
         dataset_tree_path = MetadataPath("")
     else:
-        full_into_dataset_path = into_dataset_path.resolve()
+        full_into_dataset_path = get_resolved_path(str(into_dataset_path))
         dataset_tree_path = MetadataPath(
             full_dataset_path.relative_to(full_into_dataset_path))
 
@@ -623,12 +858,12 @@ def ensure_content_availability(extractor: FileMetadataExtractor,
                                             result_renderer="disabled"):
             if result.get("status", "") == "error":
                 lgr.error(
-                    "cannot make content of {} available in dataset {}".format(
-                        file_info.path, extractor.dataset))
+                    "cannot make content of %s available in dataset %s",
+                    file_info.path, extractor.dataset)
                 return
         lgr.debug(
-            "requested content {}:{} available".format(
-                extractor.dataset.path, file_info.intra_dataset_path))
+            "requested content %s:%s available",
+            extractor.dataset.path, file_info.intra_dataset_path)
 
 
 def ensure_legacy_path_availability(ep: ExtractionArguments, path: str):
@@ -639,14 +874,14 @@ def ensure_legacy_path_availability(ep: ExtractionArguments, path: str):
 
         if result.get("status", "") == "error":
             lgr.error(
-                "cannot make content of {} available "
-                "in dataset {}".format(
-                    path, ep.source_dataset))
+                "cannot make content of %s available "
+                "in dataset %s",
+                path, ep.source_dataset)
             return
 
     lgr.debug(
-        "requested content {}:{} available".format(
-            ep.source_dataset.path, path))
+        "requested content %s:%s available",
+        ep.source_dataset.path, path)
 
 
 def ensure_legacy_content_availability(ep: ExtractionArguments,
@@ -655,19 +890,39 @@ def ensure_legacy_content_availability(ep: ExtractionArguments,
                                        status: List[dict]):
 
     try:
-        for required_element in extractor.get_required_content(
-                    ep.source_dataset,
-                    operation,
-                    status):
-
-            ensure_legacy_path_availability(ep, required_element.path)
+        required_paths = [
+            required_element.path
+            for required_element in extractor.get_required_content(
+                ep.source_dataset,
+                operation,
+                status)]
     except AttributeError:
-        pass
+        return
+
+    if not required_paths:
+        return
+
+    # Fetch all required content with a single get-call, i.e. a single
+    # annex transfer session, instead of one call per required element.
+    for result in ep.source_dataset.get(path=required_paths,
+                                        get_data=True,
+                                        return_type="generator",
+                                        result_renderer="disabled"):
+        if result.get("status", "") == "error":
+            lgr.error(
+                "cannot make content of %s available in dataset %s",
+                result.get("path", "?"),
+                ep.source_dataset)
+
+    lgr.debug(
+        "requested content %s:%s available",
+        ep.source_dataset.path,
+        required_paths)
 
 
 def legacy_extract_dataset(ea: ExtractionArguments) -> Iterable[dict]:
 
-    if issubclass(ea.extractor_class, MetadataExtractor):
+    if get_extractor_kind(ea.extractor_class) == "legacy-metalad":
 
         status = ea.source_dataset.subdatasets(result_renderer="disabled")
         extractor = ea.extractor_class()
@@ -708,7 +963,7 @@ def legacy_extract_dataset(ea: ExtractionArguments) -> Iterable[dict]:
                     else {})
             }
 
-    elif issubclass(ea.extractor_class, BaseMetadataExtractor):
+    elif get_extractor_kind(ea.extractor_class) == "legacy-datalad":
 
         # Datalad legacy extractor
         ds_path = str(ea.source_dataset.pathobj)
@@ -784,7 +1039,7 @@ def legacy_get_file_info(dataset: Dataset,
 
 def legacy_extract_file(ea: ExtractionArguments) -> Iterable[dict]:
 
-    if issubclass(ea.extractor_class, MetadataExtractor):
+    if get_extractor_kind(ea.extractor_class) == "legacy-metalad":
 
         # Call metalad legacy extractor with a single status record.
         file_path = ea.source_dataset.pathobj / ea.file_tree_path
@@ -793,6 +1048,7 @@ def legacy_extract_file(ea: ExtractionArguments) -> Iterable[dict]:
         status = legacy_get_file_info(ea.source_dataset, file_path)
         ensure_legacy_content_availability(ea, extractor, "content", [status])
 
+        absolute_file_path = str(file_path.absolute())
         for result in extractor(ea.source_dataset,
                                 ea.source_dataset_version,
                                 "content",
@@ -803,7 +1059,7 @@ def legacy_extract_file(ea: ExtractionArguments) -> Iterable[dict]:
                     action="meta_extract",
                     status="ok",
                     type="file",
-                    path=str(file_path.absolute()),
+                    path=absolute_file_path,
                     metadata_record=dict(
                         type="file",
                         dataset_id=ea.source_dataset_id,
@@ -823,10 +1079,10 @@ def legacy_extract_file(ea: ExtractionArguments) -> Iterable[dict]:
                     action="meta_extract",
                     status=result["status"],
                     type="file",
-                    path=str(file_path.absolute()),
+                    path=absolute_file_path,
                     message=result["message"])
 
-    elif issubclass(ea.extractor_class, BaseMetadataExtractor):
+    elif get_extractor_kind(ea.extractor_class) == "legacy-datalad":
 
         # Datalad legacy extractor
         path = str(ea.source_dataset.pathobj / ea.file_tree_path)
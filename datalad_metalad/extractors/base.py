@@ -24,7 +24,7 @@ from uuid import UUID
 from datalad.distribution.dataset import Dataset
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(frozen=True)
 class FileInfo:
     type: str           # TODO: state constants
     git_sha_sum: str
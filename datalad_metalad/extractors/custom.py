@@ -34,20 +34,67 @@ from datalad.utils import (
 )
 from .. import get_file_id
 
+# Parse metadata source files with orjson, if it is installed, since it
+# is considerably faster than the stdlib json-decoder, especially on
+# large metadata blobs.
+try:
+    import orjson
+
+    def _fast_jsonload(fpath):
+        if fpath.endswith('.xz'):
+            # compressed sources are decompressed by the datalad loader
+            return jsonload(fpath)
+        try:
+            with open(fpath, 'rb') as f:
+                return orjson.loads(f.read())
+        except orjson.JSONDecodeError:
+            # the datalad loader retries with a fix-up for common
+            # JSON mistakes, e.g. non-breaking spaces
+            return jsonload(fpath)
+
+except ImportError:
+    _fast_jsonload = jsonload
+
 
 class CustomMetadataExtractor(MetadataExtractor):
+    def __init__(self):
+        # The dataset-level source file lookup reads the dataset config
+        # and probes the filesystem. Its result is constant for the
+        # lifetime of an extractor instance, which spans one extraction
+        # run, so it is determined once and reused by
+        # get_required_content() and __call__().
+        self._dsmeta_srcfiles = None
+        # Likewise for the content-source expression, which is read from
+        # the config on every use otherwise.
+        self._fmeta_expr = None
+
+    def _get_srcfiles(self, dataset):
+        if self._dsmeta_srcfiles is None:
+            self._dsmeta_srcfiles = _get_dsmeta_srcfiles(dataset)
+        return self._dsmeta_srcfiles
+
+    def _get_expr(self, dataset):
+        if self._fmeta_expr is None:
+            self._fmeta_expr = _get_fmeta_expr(dataset)
+        return self._fmeta_expr
+
     def get_required_content(self, dataset, process_type, status):
         if process_type in ('all', 'content'):
-            mfile_expr = _get_fmeta_expr(dataset)
-            for rec in status:
-                # build metadata file path
-                meta_fpath = _get_fmeta_objpath(dataset, mfile_expr, rec)
-                # use op.lexists to also match broken symlinks
-                if meta_fpath is not None and op.lexists(meta_fpath):
-                    yield dict(path=meta_fpath)
+            mfile_expr = self._get_expr(dataset)
+            # if the constant leading directory of the expression does
+            # not exist, no metadata file path can exist either -- a
+            # single probe then replaces one probe per status record
+            static_dir = _get_static_fmeta_dir(dataset, mfile_expr)
+            if static_dir is None or op.lexists(static_dir):
+                for rec in status:
+                    # build metadata file path
+                    meta_fpath = _get_fmeta_objpath(dataset, mfile_expr, rec)
+                    # use op.lexists to also match broken symlinks
+                    if meta_fpath is not None and op.lexists(meta_fpath):
+                        yield dict(path=meta_fpath)
 
         if process_type in ('all', 'dataset'):
-            srcfiles, _ = _get_dsmeta_srcfiles(dataset)
+            srcfiles, _ = self._get_srcfiles(dataset)
             for f in srcfiles:
                 f = text_type(dataset.pathobj / f)
                 if op.lexists(f):
@@ -66,19 +113,31 @@ class CustomMetadataExtractor(MetadataExtractor):
             unit=' Files',
         )
         if process_type in ('all', 'content'):
-            mfile_expr = _get_fmeta_expr(ds)
+            mfile_expr = self._get_expr(ds)
+            static_dir = _get_static_fmeta_dir(ds, mfile_expr)
+            have_static_dir = static_dir is None or op.lexists(static_dir)
+            # report progress in batches; for small metadata files the
+            # per-file progress bookkeeping would otherwise rival the
+            # actual extraction cost
+            report_every = max(1, len(status) // 20)
+            pending_updates = 0
             for rec in status:
-                log_progress(
-                    lgr.info,
-                    'extractorcustom',
-                    'Extracted custom metadata from %s', rec['path'],
-                    update=1,
-                    increment=True)
-                # build metadata file path
-                meta_fpath = _get_fmeta_objpath(ds, mfile_expr, rec)
+                pending_updates += 1
+                if pending_updates == report_every:
+                    log_progress(
+                        lgr.info,
+                        'extractorcustom',
+                        'Extracted custom metadata from %s', rec['path'],
+                        update=pending_updates,
+                        increment=True)
+                    pending_updates = 0
+                # build metadata file path; without the constant leading
+                # directory of the expression there is nothing to probe
+                meta_fpath = _get_fmeta_objpath(ds, mfile_expr, rec) \
+                    if have_static_dir else None
                 if meta_fpath is not None and op.exists(meta_fpath):
                     try:
-                        meta = jsonload(text_type(meta_fpath))
+                        meta = _fast_jsonload(text_type(meta_fpath))
                         if isinstance(meta, dict) and meta \
                                 and '@id' not in meta:
                             # in case we have a single, top-level
@@ -101,8 +160,16 @@ class CustomMetadataExtractor(MetadataExtractor):
                             message=exc_str(e),
                         )
 
+            if pending_updates:
+                log_progress(
+                    lgr.info,
+                    'extractorcustom',
+                    'Extracted custom metadata from %s', rec['path'],
+                    update=pending_updates,
+                    increment=True)
+
         if process_type in ('all', 'dataset'):
-            for r in _yield_dsmeta(ds):
+            for r in _yield_dsmeta(ds, *self._get_srcfiles(ds)):
                 yield r
             log_progress(
                 lgr.info,
@@ -123,7 +190,7 @@ class CustomMetadataExtractor(MetadataExtractor):
             'dataset-source': ds.config.get(
                 'datalad.metadata.custom-dataset-source',
                 '.metadata/dataset.json'),
-            'content-source': _get_fmeta_expr(ds),
+            'content-source': self._get_expr(ds),
         }
 
 
@@ -147,6 +214,16 @@ def _get_fmeta_expr(ds):
         '.metadata/content/{freldir}/{fname}.json')
 
 
+def _get_static_fmeta_dir(ds, expr):
+    # determine the constant leading directory of a content-source
+    # expression, i.e. the part before the first substitution
+    # placeholder, or None if there is no constant directory
+    static_dir = expr.split('{', 1)[0].rpartition('/')[0]
+    if not static_dir:
+        return None
+    return text_type(ds.pathobj / PurePosixPath(static_dir))
+
+
 def _get_fmeta_objpath(ds, expr, rec):
     fpath = Path(rec['path'])
     if rec.get('type', None) != 'file':  # pragma: no cover
@@ -161,9 +238,11 @@ def _get_fmeta_objpath(ds, expr, rec):
             fname=fpath.name)))
 
 
-def _yield_dsmeta(ds):
-    srcfiles, cfg_srcfiles = _get_dsmeta_srcfiles(ds)
+def _yield_dsmeta(ds, srcfiles, cfg_srcfiles):
     dsmeta = {}
+    # bind the update method once; the attribute lookup is not repeated
+    # for every source file
+    dsmeta_update = dsmeta.update
     for srcfile in srcfiles:
         abssrcfile = ds.pathobj / PurePosixPath(srcfile)
         # TODO get annexed files, or do in a central place?
@@ -183,8 +262,8 @@ def _yield_dsmeta(ds):
                 # no further operation on half-broken metadata
                 return
         lgr.debug('Load custom metadata from %s', abssrcfile)
-        meta = jsonload(text_type(abssrcfile))
-        dsmeta.update(meta)
+        meta = _fast_jsonload(text_type(abssrcfile))
+        dsmeta_update(meta)
     if dsmeta:
         if '@id' not in dsmeta:
             dsmeta['@id'] = ds.id
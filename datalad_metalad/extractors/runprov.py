@@ -61,17 +61,31 @@ from .. import (
     get_file_id,
     get_agent_id,
 )
-from six import (
-    text_type,
-)
 from datalad.support.json_py import (
     loads as jsonloads,
     load as jsonload,
 )
+
+# Parse run-record JSON with orjson, if it is installed, since it is
+# considerably faster than the stdlib json-decoder.
+try:
+    import orjson
+
+    def _fast_jsonloads(text):
+        try:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
+            # the datalad loader retries with a fix-up for common
+            # JSON mistakes, e.g. non-breaking spaces
+            return jsonloads(text)
+
+except ImportError:
+    _fast_jsonloads = jsonloads
 from datalad.utils import (
     Path,
 )
 
+import os
 import logging
 lgr = logging.getLogger('datalad.metadata.extractors.runprov')
 
@@ -84,20 +98,35 @@ class RunProvenanceExtractor(MetadataExtractor):
         # lookup dict to find an activity that generated a file at a particular
         # path
         path_db = {}
-        # all discovered activities indexed by their commit sha
-        activities = {}
+        # dataset-level graph documents of the discovered activities
+        graph = []
+        # agent documents, collected for a unique list at the end of the
+        # graph
+        agents = {}
 
-        for rec in yield_run_records(ds):
-            # run records are coming in latest first
+        # Map each status record to its dataset-relative POSIX path once.
+        # The prefix strip avoids a Path construction and a parent walk
+        # per entry; the Path-based fallback covers unusual path
+        # spellings.
+        ds_root = str(ds.pathobj) + os.sep
+        root_len = len(ds_root)
+        relpaths = [
+            rec['path'][root_len:].replace(os.sep, '/')
+            if rec['path'].startswith(ds_root)
+            else Path(rec['path']).relative_to(ds.pathobj).as_posix()
+            for rec in status]
+        # only these paths can ever be looked up in path_db
+        wanted = set(relpaths)
+
+        def _update_path_db(rec, undecided=None):
+            # run records are coming in latest first; deletions and paths
+            # outside the to-be-described set were already dropped at
+            # parse time
             for d in rec.pop('diff', []):
                 if d['path'] in path_db:
                     # records are latest first, if we have an entry, we already
                     # know about the latest change
                     continue
-                if d['mode'] == '000000':
-                    # this file was deleted, hence it cannot possibly be part
-                    # of the to-be-described set of files
-                    continue
                 # record which activity generated this file
                 path_db[d['path']] = dict(
                     activity=rec['gitshasum'],
@@ -106,16 +135,60 @@ class RunProvenanceExtractor(MetadataExtractor):
                     # between this state and the to-be-described state
                     gitshasum=d['gitshasum'],
                 )
-            activities[rec['gitshasum']] = rec
+                if undecided is not None:
+                    undecided.discard(d['path'])
+
+        if process_type in ('all', 'dataset'):
+            # every recorded activity is reported at the dataset level,
+            # so the complete history has to be read; the graph document
+            # and the agent record are built in the same pass, while the
+            # freshly parsed record is still hot
+            for rec in yield_run_records(
+                    ds,
+                    wanted_paths=wanted if process_type == 'all' else set()):
+                if process_type == 'all':
+                    _update_path_db(rec)
+                else:
+                    # the path lookup is never consulted
+                    rec.pop('diff', None)
+                agent_id = get_agent_id(rec['author_name'], rec['author_email'])
+                # do not report docs on agents immediately, but collect them
+                # and give unique list at the end
+                agents[agent_id] = dict(
+                    name=rec['author_name'],
+                    email=rec['author_email']
+                )
+                graph.append({
+                    '@id': rec['gitshasum'],
+                    '@type': 'activity',
+                    'atTime': rec['commit_date'],
+                    'prov:wasAssociatedWith': {
+                        '@id': agent_id,
+                    },
+                    # TODO extend message with formatted run record
+                    # targeted for human consumption (but consider
+                    # possible leakage of information from sidecar
+                    # runrecords)
+                    'rdfs:comment': rec['message'],
+                })
+        else:
+            # only content reports are requested: the history is only
+            # needed up to the point where the latest change of every
+            # file in the to-be-described set is known, older records
+            # cannot contribute to the report
+            undecided = set(relpaths)
+            for rec in yield_run_records(
+                    ds, need_runrecord=False, wanted_paths=wanted):
+                _update_path_db(rec, undecided)
+                if not undecided:
+                    break
 
         yielded_files = False
         if process_type in ('all', 'content'):
-            for rec in status:
+            for rec, relpath in zip(status, relpaths):
                 # see if we have any knowledge about this entry
                 # from any of the activity change logs
-                dbrec = path_db.get(
-                    Path(rec['path']).relative_to(ds.pathobj).as_posix(),
-                    {})
+                dbrec = path_db.get(relpath, {})
                 if dbrec.get('gitshasum', None) == rec.get('gitshasum', ''):
                     # the file at this path was generated by a recorded
                     # activity
@@ -140,37 +213,12 @@ class RunProvenanceExtractor(MetadataExtractor):
                     pass
 
         if process_type in ('all', 'dataset'):
-            agents = {}
-            graph = []
-            for actsha in sorted(activities):
-                rec = activities[actsha]
-                agent_id = get_agent_id(rec['author_name'], rec['author_email'])
-                # do not report docs on agents immediately, but collect them
-                # and give unique list at the end
-                agents[agent_id] = dict(
-                    name=rec['author_name'],
-                    email=rec['author_email']
-                )
-                graph.append({
-                    '@id': actsha,
-                    '@type': 'activity',
-                    'atTime': rec['commit_date'],
-                    'prov:wasAssociatedWith': {
-                        '@id': agent_id,
-                    },
-                    # TODO extend message with formatted run record
-                    # targeted for human consumption (but consider
-                    # possible leakage of information from sidecar
-                    # runrecords)
-                    'rdfs:comment': rec['message'],
-                })
             # and now documents on the committers
             # this is likely a duplicate of a report to be expected by
             # the datalad_core extractor, but over there it is configurable
             # and we want self-contained reports per extractor
             # the redundancy will be eaten by XZ compression
-            for agent in sorted(agents):
-                rec = agents[agent]
+            for agent, rec in agents.items():
                 graph.append({
                     '@id': agent,
                     '@type': 'agent',
@@ -192,18 +240,22 @@ class RunProvenanceExtractor(MetadataExtractor):
                 )
 
 
-def yield_run_records(ds):
+def yield_run_records(ds, need_runrecord=True, wanted_paths=None):
 
     def _finalize_record(r):
         msg, rec = _split_record_message(r.pop('body', []))
         r['message'] = msg
+        if not need_runrecord:
+            # the caller will not look at the run record: skip the JSON
+            # parse, and in particular do not load any sidecar files
+            return r
         # TODO this can also just be a runrecord ID in which case we need
         # to load the file and report its content
-        rec = jsonloads(rec)
+        rec = _fast_jsonloads(rec)
         if not isinstance(rec, dict):
             # this is a runinfo file name
             rec = jsonload(
-                text_type(ds.pathobj / '.datalad' / 'runinfo' / rec),
+                str(ds.pathobj / '.datalad' / 'runinfo' / rec),
                 # TODO this should not be necessary, instead jsonload()
                 # should be left on auto, and `run` should save compressed
                 # files with an appropriate extension
@@ -212,60 +264,65 @@ def yield_run_records(ds):
         r['run_record'] = rec
         return r
 
-    record = None
-    indiff = False
-    for line in ds.repo.call_git_items_(
-            ['log', '-F',
-             '--grep', '=== Do not change lines below ===',
-             "--pretty=tformat:%x00%x00record%x00%n%H%x00%aN%x00%aE%x00%aI%n%B%x00%x00diff%x00",
-             "--raw", "--no-abbrev"]):
-        if line == '\0\0record\0':
-            indiff = False
-            # fresh record
-            if record:
-                yield _finalize_record(record)
-            record = None
-        elif record is None:
-            record = dict(zip(
-                ('gitshasum', 'author_name', 'author_email', 'commit_date'),
-                line.split('\0')
+    # Retrieve the complete log in one call and split it on the NUL-based
+    # sentinels emitted by the pretty-format. Commit messages cannot
+    # contain NUL bytes, so the sentinels are unambiguous. This replaces
+    # a per-line state machine that ran interpreter code for every line
+    # of every historic run record.
+    output = ds.repo.call_git(
+        ['log', '-F',
+         '--grep', '=== Do not change lines below ===',
+         "--pretty=tformat:%x00%x00record%x00%n%H%x00%aN%x00%aE%x00%aI%n%B%x00%x00diff%x00",
+         "--raw", "--no-abbrev"])
+
+    for blob in output.split('\0\0record\0\n'):
+        if not blob:
+            continue
+        head, _, diff_part = blob.partition('\0\0diff\0')
+        header, _, body = head.partition('\n')
+        record = dict(zip(
+            ('gitshasum', 'author_name', 'author_email', 'commit_date'),
+            header.split('\0')
+        ))
+        record['body'] = body.split('\n')
+        # if wanted_paths is given, the caller is only interested in
+        # file-generation entries for those paths: deletions and other
+        # paths are dropped before a diff dict is even allocated
+        record['diff'] = [
+            dict(zip(
+                ('prev_mode', 'mode', 'prev_gitshasum', 'gitshasum',
+                 'path'),
+                fields
             ))
-            record['body'] = []
-            record['diff'] = []
-        elif line == '\0\0diff\0':
-            indiff = True
-        elif indiff:
-            if not line.startswith(':'):
-                continue
-            diff = line[1:].split(' ')[:4]
-            diff.append(line[line.index('\t') + 1:])
-            record['diff'].append(
-                dict(zip(
-                    ('prev_mode', 'mode', 'prev_gitshasum', 'gitshasum',
-                     'path'),
-                    diff
-                ))
+            for fields in (
+                line[1:].split(' ')[:4] + [line[line.index('\t') + 1:]]
+                for line in diff_part.split('\n')
+                if line.startswith(':')
             )
-        else:
-            record['body'].append(line)
-    if record:
+            if wanted_paths is None
+            or (fields[1] != '000000' and fields[4] in wanted_paths)
+        ]
         yield _finalize_record(record)
 
 
 def _split_record_message(lines):
-    msg = []
-    run = []
-    inrec = False
-    for line in lines:
-        if line == "=== Do not change lines below ===":
-            inrec = True
-        elif line == "^^^ Do not change lines above ^^^":
-            inrec = False
-        elif inrec:
-            run.append(line)
-        else:
-            msg.append(line)
-    return '\n'.join(msg).strip(), ''.join(run)
+    # cut the message apart at the two sentinels with str.partition
+    # instead of running a per-line state machine; the commits were
+    # preselected by a substring grep for the first sentinel, so
+    # substring matching is consistent with the selection
+    text = '\n'.join(lines)
+    msg, sep, rest = text.partition("=== Do not change lines below ===")
+    if not sep:
+        return text.strip(), ''
+    run, _, after = rest.partition("^^^ Do not change lines above ^^^")
+    # re-join message parts with the single newline that separated each
+    # part from its sentinel line
+    if msg.endswith('\n'):
+        msg = msg[:-1]
+    if after.startswith('\n'):
+        after = after[1:]
+    # the run record lines are concatenated without separator
+    return (msg + '\n' + after).strip(), run.replace('\n', '')
 
 
 # TODO report runrecord directory as content-needed, if configuration wants this
@@ -28,6 +28,9 @@ from dataladmetadatamodel.mtreenode import MTreeNode
 
 root_path = MetadataPath("")
 
+# Characters that indicate a shell-style wildcard in a pattern element
+wildcard_characters = frozenset("*?[")
+
 
 @dataclass(frozen=True)
 class StackItem:
@@ -152,10 +155,32 @@ class MTreeSearch:
                     # match anything and go to the next item
                     continue
 
+                pattern_element = pattern_elements[current_item.item_level]
+
+                # If the pattern element contains no wildcard characters,
+                # it can only match a child with exactly that name. Look
+                # the child up directly instead of matching the pattern
+                # against every child node. This prunes the traversal of
+                # all non-matching subtrees in a single step.
+                if not wildcard_characters.intersection(pattern_element):
+                    child_mtree = current_item.node.child_nodes.get(
+                        pattern_element)
+                    if child_mtree is not None \
+                            and pattern_element != item_indicator:
+                        to_process.append(
+                            StackItem(
+                                current_item.item_path / pattern_element,
+                                current_item.item_level + 1,
+                                child_mtree,
+                                child_mtree.ensure_mapped()
+                            )
+                        )
+                    continue
+
                 # Check whether the current pattern matches any children,
                 # if it does, add the children to `to_process`.
                 for child_name, child_mtree in current_item.node.child_nodes.items():
-                    if fnmatch.fnmatch(child_name, pattern_elements[current_item.item_level]):
+                    if fnmatch.fnmatch(child_name, pattern_element):
                         # If we have an item indicator, do not append the item
                         # indicator node
                         if item_indicator is None or item_indicator != child_name:
@@ -92,6 +92,19 @@ class TestTreeSearchMatching(TestMTreeSearchBase):
         for result in results[0]:
             self.assertIn(result, results[1])
 
+    def test_literal_pattern(self):
+        results = list(
+            self.mtree_search.search_pattern(
+                pattern=MetadataPath("s1/s1.1/d1.1.1")))
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0][0], MetadataPath("s1/s1.1/d1.1.1"))
+
+    def test_literal_pattern_no_match(self):
+        results = list(
+            self.mtree_search.search_pattern(
+                pattern=MetadataPath("s1/no_such_element")))
+        self.assertEqual(results, [])
+
     def test_item_detection(self):
         results = list(
             self.mtree_search.search_pattern(
@@ -186,6 +186,62 @@ def test_file_extraction_result(ds_path=None):
         "example file extractor executed at "))
 
 
+def _without_execution_times(metadata_record: dict) -> dict:
+    # the extraction time and the comment written by the example file
+    # extractor carry execution timestamps that necessarily differ
+    # between invocations
+    record = dict(metadata_record)
+    del record["extraction_time"]
+    record["extracted_metadata"] = {
+        key: value
+        for key, value in record["extracted_metadata"].items()
+        if key != "comment"}
+    return record
+
+
+@with_tree(meta_tree)
+def test_multiple_path_extraction_result(ds_path=None):
+
+    ds = _create_dataset_at_path(ds_path)
+
+    file_paths = ["sub/one", "sub/nothing"]
+    extractor_name = "metalad_example_file"
+    extractor_class = get_extractor_class(extractor_name)
+    extractor_version = extractor_class(None, None, None).get_version()
+
+    res = meta_extract(
+        extractorname=extractor_name,
+        path=file_paths,
+        dataset=ds,
+        **common_kwargs)
+
+    assert_result_count(res, 2)
+    assert_result_count(res, 2, type="file")
+    assert_result_count(res, 0, type="dataset")
+
+    for file_path, result in zip(file_paths, res):
+        metadata_record = result["metadata_record"]
+        _check_metadata_record(
+            metadata_record=metadata_record,
+            dataset=ds,
+            extractor_name=extractor_name,
+            extractor_version=extractor_version,
+            extraction_parameter={},
+            path=file_path)
+
+        # the record must be identical to the one a single-path
+        # invocation produces for the same path
+        single_res = meta_extract(
+            extractorname=extractor_name,
+            path=file_path,
+            dataset=ds,
+            **common_kwargs)
+        assert_result_count(single_res, 1)
+        eq_(
+            _without_execution_times(metadata_record),
+            _without_execution_times(single_res[0]["metadata_record"]))
+
+
 @with_tree(meta_tree)
 def test_legacy1_dataset_extraction_result(ds_path=None):
 
@@ -675,3 +731,64 @@ def test_submodule_status_suppression(tmp_dir_path_str=None):
 
     # Ensure that only JSON is written out
     json_object = json.loads(output)
+
+
+@with_tree(meta_tree)
+def test_extraction_result_cache_hit(ds_path=None):
+
+    ds = _create_dataset_at_path(ds_path)
+    ds.config.set(
+        "datalad.metadata.extract-result-cache", "true", scope="local")
+
+    extract_kwargs = dict(
+        extractorname="metalad_example_file",
+        path="sub/one",
+        dataset=ds,
+        **common_kwargs)
+
+    miss_res = meta_extract(**extract_kwargs)
+    hit_res = meta_extract(**extract_kwargs)
+
+    assert_result_count(miss_res, 1, type="file")
+    assert_result_count(hit_res, 1, type="file")
+
+    # a cache hit replays the stored result, including the original
+    # extraction time, so the record is identical to the one that was
+    # reported on the miss
+    eq_(miss_res[0]["metadata_record"], hit_res[0]["metadata_record"])
+
+
+@with_tree(meta_tree)
+def test_extraction_result_cache_invalidation(ds_path=None):
+
+    ds = _create_dataset_at_path(ds_path)
+    ds.config.set(
+        "datalad.metadata.extract-result-cache", "true", scope="local")
+
+    extract_kwargs = dict(
+        extractorname="metalad_example_file",
+        path="sub/one",
+        dataset=ds,
+        **common_kwargs)
+
+    cached_record = meta_extract(**extract_kwargs)[0]["metadata_record"]
+
+    # a content change alters the git blob of the file and must lead to
+    # a fresh extraction instead of a replay of the cached result
+    (ds.pathobj / "sub" / "one").write_text("11")
+    ds.save(**common_kwargs)
+    content_change_record = \
+        meta_extract(**extract_kwargs)[0]["metadata_record"]
+    assert_true(
+        content_change_record["extraction_time"]
+        > cached_record["extraction_time"])
+    eq_(content_change_record["extracted_metadata"]["content_byte_size"], 2)
+
+    # changed extraction parameters must also lead to a fresh extraction
+    parameter_record = meta_extract(
+        extractorargs=["key1", "value1"],
+        **extract_kwargs)[0]["metadata_record"]
+    assert_true(
+        parameter_record["extraction_time"]
+        > content_change_record["extraction_time"])
+    eq_(parameter_record["extraction_parameter"], {"key1": "value1"})